@@ -8,20 +8,63 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import os
 import sys
+import stat
 import threading
 from pathlib import Path
 import queue
 import subprocess
+import select
+import signal
+import collections
+import json
+import logging
+import logging.handlers
 
-# Import our pipeline (assuming it's in the same directory)
-try:
-    from cvat_to_deeplabcut_pipeline import CVATToDeepLabCutPipeline
-    PIPELINE_AVAILABLE = True
-except ImportError:
-    PIPELINE_AVAILABLE = False
+# Pipeline modules (assuming they're in the same directory). They are only
+# imported by the runner process, so the GUI starts without loading OpenCV,
+# pandas or DeepLabCut
+PIPELINE_PATH = Path(__file__).parent / "cvat_to_deeplabcut_pipeline.py"
+RUNNER_PATH = Path(__file__).parent / "pipeline_runner.py"
+
+
+class LogTextHandler(logging.Handler):
+    """Logging handler that hands formatted records over to the GUI thread"""
+    
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+        
+    def emit(self, record):
+        try:
+            message = self.format(record)
+            with self.app.log_lock:
+                self.app.log_buffer.append(message)
+                # Only wake the GUI thread if it is not already due to
+                # drain, and never once the window is closing: the GUI
+                # thread no longer services calls from other threads then
+                wake = not self.app.closing and not self.app.log_pending.is_set()
+                if wake:
+                    self.app.log_pending.set()
+            if wake:
+                self.app.root.event_generate("<<LogUpdate>>", when="tail")
+        except Exception:
+            self.handleError(record)
 
 
 class CVATDLCGui:
+    # Maximum number of lines kept in the conversion log widget
+    MAX_LINES = 2000
+    # Maximum number of log lines waiting to be displayed; oldest are dropped
+    LOG_BUFFER_SIZE = 10000
+    LOG_CHUNK_SIZE = 64 * 1024
+    
+    # File dialog filters
+    XML_FILETYPES = [("XML files", "*.xml"), ("All files", "*.*")]
+    VIDEO_FILETYPES = [("Video files", "*.mp4 *.avi *.mov *.mkv"), ("All files", "*.*")]
+    
+    # Where the last used dialog directories are remembered between runs
+    SETTINGS_PATH = Path.home() / ".cvat_dlc_gui.json"
+
     def __init__(self, root):
         self.root = root
         self.root.title("CVAT to DeepLabCut Converter")
@@ -37,15 +80,38 @@ class CVATDLCGui:
         self.start_frame = tk.IntVar(value=0)
         self.end_frame = tk.IntVar(value=0)
         
-        # Queue for thread communication
-        self.log_queue = queue.Queue()
+        # Input file stats from the last validation, and a per-field cache
+        # of lookups that is dropped whenever the field changes
+        self.xml_stat = None
+        self.video_stat = None
+        self._cached_paths = {}
+        self.xml_file.trace_add('write', lambda *args: self._cached_paths.pop('xml', None))
+        self.video_file.trace_add('write', lambda *args: self._cached_paths.pop('video', None))
+        
+        # Log records go through a queue to a listener thread, which hands
+        # the formatted lines to the GUI thread via log_buffer
+        self.log_buffer = collections.deque(maxlen=self.LOG_BUFFER_SIZE)
+        self.log_lock = threading.Lock()
+        self.log_pending = threading.Event()
+        self.log_queue = queue.Queue(-1)
+        self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(logging.handlers.QueueHandler(self.log_queue))
+        self.log_listener = logging.handlers.QueueListener(self.log_queue, LogTextHandler(self))
+        self.log_listener.start()
+        
+        # Runner process of the conversion in progress, stopped on close
+        self.proc = None
+        self.closing = False
+        
+        # Directories last used by each file dialog, saved on exit
+        self.last_dirs = self.load_last_dirs()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Setup GUI
         self.setup_gui()
         
-        # Start checking log queue
-        self.root.after(100, self.check_log_queue)
-        
     def setup_gui(self):
         # Main frame
         main_frame = ttk.Frame(self.root, padding="10")
@@ -132,8 +198,20 @@ class CVATDLCGui:
         log_frame.rowconfigure(0, weight=1)
         main_frame.rowconfigure(6, weight=1)
         
-        self.log_text = scrolledtext.ScrolledText(log_frame, height=15, state='disabled')
+        # The log stays in 'normal' state so writing to it needs no state
+        # toggles; key and paste bindings keep it read-only for the user
+        # Undo is disabled so large flushes do not build up an edit history
+        self.log_text = scrolledtext.ScrolledText(log_frame, height=15, undo=False,
+                                                  maxundo=0, autoseparators=False)
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.log_text.bind('<Key>', self.block_log_edit)
+        # Middle-click paste and menu edits arrive as virtual events
+        for event in ('<<PasteSelection>>', '<<Paste>>', '<<Cut>>', '<<Clear>>'):
+            self.log_text.bind(event, lambda e: 'break')
+        
+        # Drain the log queue only when a producer signals new messages
+        self.root.bind("<<LogUpdate>>", self._schedule_log_drain)
+        self._drain_scheduled = False
         
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
@@ -143,24 +221,81 @@ class CVATDLCGui:
     def browse_xml_file(self):
         filename = filedialog.askopenfilename(
             title="Select CVAT XML file",
-            filetypes=[("XML files", "*.xml"), ("All files", "*.*")]
+            filetypes=self.XML_FILETYPES,
+            initialdir=self.last_dirs.get('xml', str(Path.home()))
         )
         if filename:
             self.xml_file.set(filename)
+            self.last_dirs['xml'] = os.path.dirname(filename)
             
     def browse_video_file(self):
         filename = filedialog.askopenfilename(
             title="Select video file",
-            filetypes=[("Video files", "*.mp4 *.avi *.mov *.mkv"), ("All files", "*.*")]
+            filetypes=self.VIDEO_FILETYPES,
+            initialdir=self.last_dirs.get('video', str(Path.home()))
         )
         if filename:
             self.video_file.set(filename)
+            self.last_dirs['video'] = os.path.dirname(filename)
             
     def browse_output_dir(self):
-        dirname = filedialog.askdirectory(title="Select output directory")
+        dirname = filedialog.askdirectory(
+            title="Select output directory",
+            initialdir=self.last_dirs.get('output', str(Path.home()))
+        )
         if dirname:
             self.output_dir.set(dirname)
+            self.last_dirs['output'] = dirname
+            
+    def load_last_dirs(self):
+        """Load the directories last used by the file dialogs"""
+        try:
+            with open(self.SETTINGS_PATH, encoding='utf-8') as f:
+                last_dirs = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return last_dirs if isinstance(last_dirs, dict) else {}
+        
+    def save_last_dirs(self):
+        """Atomically save the directories last used by the file dialogs"""
+        tmp_path = self.SETTINGS_PATH.with_name(self.SETTINGS_PATH.name + ".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.last_dirs, f, indent=2)
+            os.replace(tmp_path, self.SETTINGS_PATH)
+        except OSError:
+            pass
             
+    def on_close(self):
+        """Stop any running conversion, save dialog directories and close the window"""
+        if self.closing:
+            return
+        with self.log_lock:
+            # From here on the listener never calls into Tk again
+            self.closing = True
+        self.stop_conversion()
+        # Let the listener finish without joining it here: a wakeup it sent
+        # just before closing waits for this thread, which would deadlock
+        self.log_listener.enqueue_sentinel()
+        self.save_last_dirs()
+        self.root.destroy()
+        
+    def stop_conversion(self):
+        """Terminate the runner process and its extraction workers, if running"""
+        proc = self.proc
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            if os.name == 'nt':
+                proc.terminate()
+            else:
+                # The runner leads its own process group, which also holds
+                # its frame extraction worker processes
+                os.killpg(proc.pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+        proc.wait()
+        
     def on_frame_selection_change(self):
         if self.frame_selection.get() == "range":
             self.start_entry.config(state='normal')
@@ -169,24 +304,83 @@ class CVATDLCGui:
             self.start_entry.config(state='disabled')
             self.end_entry.config(state='disabled')
             
-    def log_message(self, message):
-        """Add message to log queue"""
-        self.log_queue.put(message)
+    def block_log_edit(self, event):
+        """Reject typing in the log while still allowing copy and navigation"""
+        if event.state & 0x4 and event.keysym.lower() == 'c':
+            return None
+        if event.keysym in ('Up', 'Down', 'Left', 'Right', 'Prior', 'Next', 'Home', 'End'):
+            return None
+        return 'break'
         
-    def check_log_queue(self):
-        """Check for messages in log queue and display them"""
+    def log_message(self, message):
+        """Send message to the conversion log"""
+        self.logger.info(message)
+        
+    def _schedule_log_drain(self, event=None):
+        """Coalesce log wakeups into one drain once Tk is idle"""
+        # Let Tk service paint and input events before catching up on the log
+        if not self._drain_scheduled:
+            self._drain_scheduled = True
+            self.root.after_idle(self._drain_log_queue)
+            
+    def _drain_log_queue(self):
+        """Display all messages currently waiting in the log buffer"""
+        self._drain_scheduled = False
+        if self.closing:
+            return
+        # Clear before swapping so lines logged from now on send a new wakeup
+        with self.log_lock:
+            self.log_pending.clear()
+        # Drain everything buffered since the last wakeup and write it in one
+        # insert, so bursty pipeline output costs a single widget update
+        with self.log_lock:
+            messages, self.log_buffer = (self.log_buffer,
+                                         collections.deque(maxlen=self.LOG_BUFFER_SIZE))
+        
+        if messages:
+            # Detach the scrollbar during the bulk edit so it is not
+            # recomputed until the text is in place
+            scroll_command = self.log_text.cget('yscrollcommand')
+            self.log_text.configure(yscrollcommand='')
+            # Only the last MAX_LINES lines can survive the trim below
+            if len(messages) > self.MAX_LINES:
+                messages = list(messages)[-self.MAX_LINES:]
+            text = "\n".join(messages) + "\n"
+            if len(text) <= self.LOG_CHUNK_SIZE:
+                self.log_text.insert(tk.END, text)
+            else:
+                # Very large flushes go straight to Tcl in blocks, letting
+                # Tk redraw between them so the window stays responsive
+                for i in range(0, len(text), self.LOG_CHUNK_SIZE):
+                    self.log_text.tk.call(self.log_text._w, 'insert', 'end',
+                                          text[i:i + self.LOG_CHUNK_SIZE])
+                    self.root.update_idletasks()
+            # Trim the oldest lines so the widget never grows unbounded
+            current = int(self.log_text.index('end-1c').split('.')[0])
+            if current > self.MAX_LINES:
+                self.log_text.delete('1.0', f'{current - self.MAX_LINES}.0')
+            self.log_text.configure(yscrollcommand=scroll_command)
+            self.log_text.see(tk.END)
+            
+    def _check_file(self, key, path):
+        """Return the stat result of an existing regular file, or None"""
+        cached = self._cached_paths.get(key)
+        if cached is not None and cached[0] == path:
+            return cached[1]
+            
         try:
-            while True:
-                message = self.log_queue.get_nowait()
-                self.log_text.config(state='normal')
-                self.log_text.insert(tk.END, message + "\n")
-                self.log_text.see(tk.END)
-                self.log_text.config(state='disabled')
-        except queue.Empty:
-            pass
-        finally:
-            self.root.after(100, self.check_log_queue)
+            file_stat = Path(path).stat()
+        except OSError:
+            return None
+        if not stat.S_ISREG(file_stat.st_mode):
+            return None
             
+        # Only usable files are cached, so a missing or empty file is
+        # looked up again on the next validation
+        if file_stat.st_size > 0:
+            self._cached_paths[key] = (path, file_stat)
+        return file_stat
+        
     def validate_inputs(self):
         """Validate user inputs"""
         if not self.xml_file.get():
@@ -201,14 +395,25 @@ class CVATDLCGui:
             messagebox.showerror("Error", "Please select an output directory")
             return False
             
-        if not os.path.exists(self.xml_file.get()):
+        # The stat results are kept for the conversion log
+        self.xml_stat = self._check_file('xml', self.xml_file.get())
+        if self.xml_stat is None:
             messagebox.showerror("Error", "CVAT XML file does not exist")
             return False
             
-        if not os.path.exists(self.video_file.get()):
+        if self.xml_stat.st_size == 0:
+            messagebox.showerror("Error", "CVAT XML file is empty")
+            return False
+            
+        self.video_stat = self._check_file('video', self.video_file.get())
+        if self.video_stat is None:
             messagebox.showerror("Error", "Video file does not exist")
             return False
             
+        if self.video_stat.st_size == 0:
+            messagebox.showerror("Error", "Video file is empty")
+            return False
+            
         if self.frame_selection.get() == "range":
             start = self.start_frame.get()
             end = self.end_frame.get()
@@ -223,7 +428,7 @@ class CVATDLCGui:
         if not self.validate_inputs():
             return
             
-        if not PIPELINE_AVAILABLE:
+        if not (PIPELINE_PATH.exists() and RUNNER_PATH.exists()):
             messagebox.showerror("Error", "Pipeline module not available. Please ensure cvat_to_deeplabcut_pipeline.py is in the same directory.")
             return
             
@@ -232,149 +437,91 @@ class CVATDLCGui:
         self.progress.start()
         self.status_var.set("Converting...")
         
-        # Clear log
-        self.log_text.config(state='normal')
-        self.log_text.delete(1.0, tk.END)
-        self.log_text.config(state='disabled')
+        # Clear log once Tk is idle; the mark keeps lines logged meanwhile
+        self.log_text.mark_set('clear_end', 'end-1c')
+        self.log_text.mark_gravity('clear_end', tk.LEFT)
+        self.root.after_idle(self._clear_log)
         
         # Start conversion in separate thread
         thread = threading.Thread(target=self.run_conversion, daemon=True)
         thread.start()
         
+    def _clear_log(self):
+        """Remove the previous conversion's output from the log"""
+        # The widget holds at most MAX_LINES lines, so one delete is cheap
+        self.log_text.delete('1.0', 'clear_end')
+        self.log_text.mark_unset('clear_end')
+        
     def run_conversion(self):
         """Run the conversion process"""
         try:
-            # Create pipeline
-            pipeline = CVATToDeepLabCutPipeline()
-            
-            # Redirect print statements to our log
-            import io
-            import contextlib
-            
-            @contextlib.contextmanager
-            def capture_output():
-                old_stdout = sys.stdout
-                old_stderr = sys.stderr
-                stdout_capture = io.StringIO()
-                stderr_capture = io.StringIO()
-                try:
-                    sys.stdout = stdout_capture
-                    sys.stderr = stderr_capture
-                    yield stdout_capture, stderr_capture
-                finally:
-                    sys.stdout = old_stdout
-                    sys.stderr = old_stderr
-            
-            # Parse XML
-            self.log_message("🚀 Starting CVAT to DeepLabCut conversion...")
-            
-            with capture_output() as (stdout_capture, stderr_capture):
-                success = pipeline.parse_cvat_xml(self.xml_file.get())
-            self.log_message(stdout_capture.getvalue().strip())
-            
-            if not success:
-                self.log_message("❌ XML parsing failed")
-                self.conversion_completed(False)
-                return
-                
-            # Get video info
-            with capture_output() as (stdout_capture, stderr_capture):
-                success = pipeline.get_video_info(self.video_file.get())
-            self.log_message(stdout_capture.getvalue().strip())
+            self.log_message(f"📦 Input sizes: XML {self.xml_stat.st_size / 1e6:.1f} MB, "
+                             f"video {self.video_stat.st_size / 1e6:.1f} MB")
             
-            if not success:
-                self.log_message("❌ Failed to get video information")
-                self.conversion_completed(False)
-                return
-                
-            # Set frame selection
+            # Run the pipeline in its own process and stream its output
+            # line by line instead of capturing each stage's stdout
+            cmd = [
+                sys.executable, "-u", str(RUNNER_PATH),
+                self.xml_file.get(), self.video_file.get(), self.output_dir.get(),
+                "--project", self.project_name.get(),
+                "--scorer", self.scorer_name.get()
+            ]
             if self.frame_selection.get() == "range":
-                pipeline.frame_selection = "range"
-                pipeline.frame_range = (self.start_frame.get(), self.end_frame.get())
-            else:
-                pipeline.frame_selection = "full"
-                pipeline.frame_range = (0, pipeline.video_info['total_frames'] - 1)
+                cmd += ["--start", str(self.start_frame.get()),
+                        "--end", str(self.end_frame.get())]
                 
-            self.log_message(f"📋 Frame selection: {pipeline.frame_selection}")
-            if pipeline.frame_selection == "range":
-                self.log_message(f"   Range: {pipeline.frame_range[0]}-{pipeline.frame_range[1]}")
+            env = dict(os.environ, PYTHONIOENCODING="utf-8")
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    bufsize=0, env=env, start_new_session=(os.name != 'nt'))
+            self.proc = proc
+            self.stream_output(proc)
+            proc.stdout.close()
             
-            # Create output directory
-            os.makedirs(self.output_dir.get(), exist_ok=True)
-            
-            # Extract frames
-            with capture_output() as (stdout_capture, stderr_capture):
-                success = pipeline.extract_frames(self.video_file.get(), self.output_dir.get())
-            self.log_message(stdout_capture.getvalue().strip())
-            
-            if not success:
-                self.log_message("❌ Frame extraction failed")
-                self.conversion_completed(False)
+            returncode = proc.wait()
+            if self.closing:
+                # Stopped because the window is closing, nothing to update
                 return
-                
-            # Create CSV
-            with capture_output() as (stdout_capture, stderr_capture):
-                success = pipeline.create_deeplabcut_csv(self.output_dir.get(), 
-                                                       self.scorer_name.get(), 
-                                                       self.project_name.get())
-            self.log_message(stdout_capture.getvalue().strip())
-            
-            if not success:
-                self.log_message("❌ CSV creation failed")
-                self.conversion_completed(False)
-                return
-                
-            # Create config
-            with capture_output() as (stdout_capture, stderr_capture):
-                success = pipeline.create_deeplabcut_config(self.output_dir.get(), 
-                                                          self.project_name.get(), 
-                                                          self.scorer_name.get())
-            self.log_message(stdout_capture.getvalue().strip())
-            
-            if not success:
-                self.log_message("❌ Config creation failed")
-                self.conversion_completed(False)
-                return
-                
-            # Copy video
-            with capture_output() as (stdout_capture, stderr_capture):
-                success = pipeline.copy_video_to_project(self.video_file.get(), self.output_dir.get())
-            self.log_message(stdout_capture.getvalue().strip())
-            
-            if not success:
-                self.log_message("❌ Video copy failed")
+            if returncode != 0:
                 self.conversion_completed(False)
                 return
-                
-            # Generate H5 file using the pipeline's method
-            with capture_output() as (stdout_capture, stderr_capture):
-                success = pipeline.generate_h5_file(self.output_dir.get(), self.scorer_name.get())
-            output = stdout_capture.getvalue().strip()
-            if output:
-                self.log_message(output)
-                
-            # Create summary
-            with capture_output() as (stdout_capture, stderr_capture):
-                pipeline.create_dataset_summary(self.output_dir.get(), 
-                                               self.project_name.get(), 
-                                               self.scorer_name.get())
-            self.log_message(stdout_capture.getvalue().strip())
-            
-            self.log_message("\n🎉 Conversion completed successfully!")
-            self.log_message(f"📁 Output directory: {self.output_dir.get()}")
             
             # Show success message
-            self.root.after(0, lambda: messagebox.showinfo("Success", "Conversion completed successfully!"))
+            self.root.after_idle(lambda: messagebox.showinfo("Success", "Conversion completed successfully!"))
             self.conversion_completed(True)
             
         except Exception as e:
+            if self.closing:
+                return
             self.log_message(f"❌ Error during conversion: {str(e)}")
-            self.root.after(0, lambda: messagebox.showerror("Error", f"Conversion failed: {str(e)}"))
+            self.root.after_idle(lambda: messagebox.showerror("Error", f"Conversion failed: {str(e)}"))
             self.conversion_completed(False)
             
+    def stream_output(self, proc):
+        """Forward the runner's output to the log as each line arrives"""
+        if os.name == 'nt':
+            # select() cannot wait on pipes on Windows, use blocking reads
+            for line in iter(proc.stdout.readline, b''):
+                self.log_message(line.decode('utf-8', 'replace').rstrip())
+            return
+            
+        # Block in select() until the kernel has output for us, so lines
+        # stream as soon as they are written without any polling
+        fd = proc.stdout.fileno()
+        pending = b''
+        while True:
+            select.select([fd], [], [])
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            *lines, pending = (pending + chunk).split(b'\n')
+            for line in lines:
+                self.log_message(line.decode('utf-8', 'replace').rstrip())
+        if pending:
+            self.log_message(pending.decode('utf-8', 'replace').rstrip())
+            
     def conversion_completed(self, success):
         """Called when conversion is completed"""
-        self.root.after(0, self._conversion_completed_ui, success)
+        self.root.after_idle(self._conversion_completed_ui, success)
         
     def _conversion_completed_ui(self, success):
         """Update UI after conversion completion"""
@@ -20,27 +20,670 @@ Features:
 
 import os
 import sys
+import csv
 import argparse
-import xml.etree.ElementTree as ET
+import logging
 import pandas as pd
 import numpy as np
 import cv2
 import yaml
 import shutil
+import bisect
+import subprocess
+import queue
+import threading
+import json
+import itertools
+import textwrap
 from pathlib import Path
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, Callable, Iterator
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
+from array import array
+from fractions import Fraction
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# PyAV reads container metadata without decoding, use it when installed
+try:
+    import av
+except ImportError:
+    av = None
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+# lxml parses the same API in C considerably faster, use it when installed.
+# It can also skip events for elements the parser does not handle
+try:
+    from lxml import etree as ET
+    XMLParseError = ET.XMLSyntaxError
+    ITERPARSE_OPTIONS = {'tag': ('meta', 'track', 'box', 'points')}
+except ImportError:
+    import xml.etree.ElementTree as ET
+    XMLParseError = ET.ParseError
+    ITERPARSE_OPTIONS = {}
+
+logger = logging.getLogger(__name__)
+
+
+# Annotation rows converted and written per csv.writer.writerows call, and
+# the buffer size of the generated text files
+CSV_CHUNK_ROWS = 50_000
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _dlc_header(bodyparts: List[str], scorer: str) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Build the three DeepLabCut CSV header rows
+    
+    Args:
+        bodyparts: Bodypart names, one x and one y column each
+        scorer: Scorer name
+        
+    Returns:
+        The scorer, bodyparts and coords rows
+    """
+    n_columns = 2 * len(bodyparts)
+    return (['scorer', '', ''] + [scorer] * n_columns,
+            ['bodyparts', '', ''] + np.repeat(bodyparts, 2).tolist(),
+            ['coords', '', ''] + np.tile(['x', 'y'], len(bodyparts)).tolist())
+
+# Emit config.yaml through libyaml when available, writing None as an empty
+# value the way DeepLabCut's own config files do
+class _ConfigDumper(getattr(yaml, 'CSafeDumper', yaml.SafeDumper)):
+    pass
+
+
+_ConfigDumper.add_representer(
+    type(None), lambda dumper, _: dumper.represent_scalar('tag:yaml.org,2002:null', '')
+)
+
+# Skeleton edges drawn between bodyparts, grouped per individual
+_QUEEN_EDGES = [
+    ['Q_Head', 'Q_Neck'],
+    ['Q_Neck', 'Q_Tail'],
+    ['Q_Antenna_L1', 'Q_Antenna_L2'],
+    ['Q_Antenna_L2', 'Q_Antenna_L3'],
+    ['Q_Antenna_L3', 'Q_Head'],
+    ['Q_Antenna_R1', 'Q_Antenna_R2'],
+    ['Q_Antenna_R2', 'Q_Antenna_R3'],
+    ['Q_Antenna_R3', 'Q_Head']
+]
+_OTHER_EDGES = [
+    ['O_Head', 'O_Neck'],
+    ['O_Neck', 'O_Tail'],
+    ['O_Antenna_L1', 'O_Antenna_L2'],
+    ['O_Antenna_L2', 'O_Antenna_L3'],
+    ['O_Antenna_L3', 'O_Head'],
+    ['O_Antenna_R1', 'O_Antenna_R2'],
+    ['O_Antenna_R2', 'O_Antenna_R3'],
+    ['O_Antenna_R3', 'O_Head']
+]
+SKELETON: List[List[str]] = _QUEEN_EDGES + _OTHER_EDGES
+# Comment written above each group of edges in config.yaml
+SKELETON_GROUPS = [
+    ("# Queen bee skeleton", _QUEEN_EDGES),
+    ("# Other bee skeleton (template individual)", _OTHER_EDGES)
+]
+
+# config.yaml layout: (blank lines before, comment, keys, flow style) per
+# section, where a flow style of None writes short lists such as
+# TrainingFraction inline and keys starting with '#' are comment lines
+# written between the keys around them. The skeleton is always written from
+# SKELETON_GROUPS with inline edges
+CONFIG_SECTIONS = [
+    (0, "# Project definitions (do not edit)",
+     ['Task', 'scorer', 'date', 'multianimalproject', 'identity'], False),
+    (2, "# Project path (change when moving around)", ['project_path'], False),
+    (2, "# Default DeepLabCut engine to use for shuffle creation (either pytorch or tensorflow)",
+     ['engine'], False),
+    (2, "# Annotation data set configuration (and individual video cropping parameters)",
+     ['video_sets'], False),
+    (1, "# Other settings", ['bodyparts'], False),
+    (3, None, ['start', 'stop', 'numframes2pick'], False),
+    (2, "# Plotting configuration",
+     ['skeleton', 'skeleton_color', 'pcutoff', 'dotsize', 'alphavalue', 'colormap'], False),
+    (2, "# Training,Evaluation and Analysis configuration",
+     ['TrainingFraction', 'iteration', 'default_net_type', 'default_augmenter',
+      'snapshotindex', 'detector_snapshotindex', 'batch_size', 'detector_batch_size'], None),
+    (2, "# Cropping Parameters (for analysis and outlier frame detection)",
+     ['cropping', "#if cropping is true for analysis, then set the values here:",
+      'x1', 'x2', 'y1', 'y2'], False),
+    (2, "# Refinement configuration (parameters from annotation dataset configuration also relevant in this stage)",
+     ['corner2move2', 'move2corner'], False),
+    (2, "# Conversion tables to fine-tune SuperAnimal weights",
+     ['SuperAnimalConversionTables', 'project_name'], False),
+]
+
+# Video copy tuning: bytes per copy call and bytes between progress messages
+COPY_CHUNK_SIZE = 4 << 20
+COPY_PROGRESS_INTERVAL = 64 << 20
+# Linux ioctl that makes dst share src's blocks copy-on-write (Btrfs, XFS)
+FICLONE = getattr(fcntl, 'FICLONE', 0x40049409) if fcntl is not None else None
+
+
+def copy_file_with_progress(src: str, dst: str, stop: Optional[threading.Event] = None):
+    """
+    Copy a file in chunks, logging progress, then copy its metadata
+    
+    On Linux the file is first cloned with a reflink, which is instant on
+    copy-on-write filesystems; otherwise os.copy_file_range (which lets
+    network filesystems copy server-side) or os.sendfile keeps the data
+    out of user space. Elsewhere it falls back to buffered reads and writes.
+    
+    The data is written to a temporary file next to dst that replaces dst
+    only once complete, so a failed copy never leaves a truncated dst.
+    
+    Args:
+        src: Source file path
+        dst: Destination file path
+        stop: Event that cancels the copy when set, checked between chunks
+        
+    Raises:
+        shutil.SameFileError: src and dst are the same file
+        InterruptedError: stop was set before the copy completed
+    """
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{os.fspath(src)!r} and {os.fspath(dst)!r} are the same file")
+    
+    total = os.path.getsize(src)
+    use_sendfile = sys.platform.startswith('linux') and hasattr(os, 'sendfile')
+    use_copy_range = use_sendfile and hasattr(os, 'copy_file_range')
+    copied = 0
+    next_report = COPY_PROGRESS_INTERVAL
+    
+    cloned = False
+    tmp = f"{os.fspath(dst)}.part"
+    
+    try:
+        with open(src, 'rb') as fsrc, open(tmp, 'wb') as fdst:
+            if use_sendfile and FICLONE is not None:
+                try:
+                    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                    cloned = True
+                    logger.info(f"  Cloned {total / 1e6:.1f} MB (reflink)")
+                except OSError:
+                    # Not a copy-on-write filesystem, or source and destination
+                    # are on different filesystems
+                    pass
+            
+            while not cloned:
+                if stop is not None and stop.is_set():
+                    raise InterruptedError("Copy cancelled")
+                if use_copy_range:
+                    try:
+                        n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), COPY_CHUNK_SIZE,
+                                               copied, copied)
+                    except OSError:
+                        if copied:
+                            raise
+                        # Kernel or filesystem does not support it, e.g. across
+                        # filesystems before Linux 5.3
+                        use_copy_range = False
+                        continue
+                elif use_sendfile:
+                    try:
+                        n = os.sendfile(fdst.fileno(), fsrc.fileno(), copied, COPY_CHUNK_SIZE)
+                    except OSError:
+                        if copied:
+                            raise
+                        # Filesystem does not support sendfile, copy through user space
+                        use_sendfile = False
+                        continue
+                else:
+                    chunk = fsrc.read(COPY_CHUNK_SIZE)
+                    fdst.write(chunk)
+                    n = len(chunk)
+                
+                if not n:
+                    break
+                copied += n
+                if copied >= next_report:
+                    logger.info(f"  Copied {copied / 1e6:.1f} MB / {total / 1e6:.1f} MB")
+                    next_report += COPY_PROGRESS_INTERVAL
+        
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        # Leave no partial copy behind
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# Smallest number of frames worth handing to a separate extraction process
+MIN_FRAMES_PER_WORKER = 100
+# Decoded frames waiting to be encoded, and the range of threads encoding
+# them in each worker process
+FRAME_PREFETCH = 16
+FRAME_WRITER_THREADS = 2
+MAX_FRAME_WRITER_THREADS = 4
+# PNG encoder settings for extracted frames (lossless either way): fastest
+# zlib level with RLE, plus the cheap "up" filter where OpenCV supports it,
+# which encodes faster and smaller than the defaults on typical footage
+PNG_PARAMS = [cv2.IMWRITE_PNG_COMPRESSION, 1,
+              cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_RLE]
+if hasattr(cv2, 'IMWRITE_PNG_FILTER'):
+    PNG_PARAMS += [cv2.IMWRITE_PNG_FILTER, cv2.IMWRITE_PNG_FILTER_UP]
+
+
+def _write_frames(frames: queue.Queue, frames_dir: str) -> Optional[Exception]:
+    """
+    Encode (index, frame) items from a queue as PNG images until None arrives
+    
+    Args:
+        frames: Queue of decoded frames
+        frames_dir: Directory the frames are written to
+        
+    Returns:
+        The first error raised while writing, if any
+    """
+    # Build frame paths by string formatting rather than pathlib per frame
+    prefix = os.path.join(os.fspath(frames_dir), "frame_")
+    error = None
+    while True:
+        item = frames.get()
+        if item is None:
+            return error
+        if error is not None:
+            # Keep draining so the decoder never blocks on a full queue
+            continue
+        index, frame = item
+        try:
+            # Save frame, ensure filename corresponds to annotation data.
+            # Encode in memory and write the file ourselves: cv2.imwrite
+            # only returns False when the file cannot be written
+            ok, png = cv2.imencode('.png', frame, PNG_PARAMS)
+            if not ok:
+                raise ValueError(f"Cannot encode frame {index} as PNG")
+            with open(f"{prefix}{index:04d}.png", 'wb') as f:
+                f.write(png)
+        except Exception as e:
+            error = e
+
+
+def _open_capture(video_file: str, threads: int = 0) -> cv2.VideoCapture:
+    """
+    Open a video with OpenCV, limiting its decoder to the given threads
+    
+    Args:
+        video_file: Video file path
+        threads: Decoder threads, 0 for the backend default (all cores)
+        
+    Returns:
+        The opened capture
+    """
+    if threads and hasattr(cv2, 'CAP_PROP_N_THREADS'):
+        return cv2.VideoCapture(video_file, cv2.CAP_ANY, [cv2.CAP_PROP_N_THREADS, threads])
+    return cv2.VideoCapture(video_file)
+
+
+def _decode_frames_cv2(video_file: str, start: int, end: int,
+                       seek: Optional[Tuple[int, int]] = None,
+                       threads: int = 0) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Decode frames start..end (inclusive) of a video with OpenCV
+    
+    OpenCV seeks by frame number converted to a timestamp at the nominal
+    frame rate, which only lands on the right frame at a constant frame
+    rate, so callers only pass seek for such videos. Without it the frames
+    before start are stepped over from the beginning.
+    
+    Args:
+        video_file: Video file path
+        start: First frame index
+        end: Last frame index
+        seek: Any keyframe (frame index, pts) at or before start, given
+            only for constant frame rate videos, or None
+        threads: Decoder threads, 0 for the backend default (all cores)
+        
+    Yields:
+        Frame index and BGR image of each decoded frame
+    """
+    cap = _open_capture(video_file, threads)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video file: {video_file}")
+    
+    try:
+        seeked = False
+        if start > 0 and seek is not None:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            seeked = int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == start
+            if not seeked:
+                # Seek is not reliable for this codec, start over
+                cap.release()
+                cap = _open_capture(video_file, threads)
+        if start > 0 and not seeked:
+            # Step forward from the beginning with grab(), which skips
+            # converting the frames
+            for _ in range(start):
+                if not cap.grab():
+                    return
+        for frame_index in range(start, end + 1):
+            # Only frames inside the range are ever decoded
+            if not cap.grab():
+                break
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield frame_index, frame
+    finally:
+        cap.release()
+
+
+def _decode_frames_av(video_file: str, start: int, end: int,
+                      seek: Optional[Tuple[int, int]] = None,
+                      threads: int = 0) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Decode frames start..end (inclusive) of a video with PyAV
+    
+    Seeks to the given keyframe and decodes forward with FFmpeg's own
+    frame/slice threading. Frames are numbered by counting from the
+    keyframe's known index rather than from their timestamps, so the
+    numbers match sequential decoding even at a variable frame rate.
+    
+    Args:
+        video_file: Video file path
+        start: First frame index
+        end: Last frame index
+        seek: Keyframe (frame index, pts) at or before start to decode
+            from, or None to decode from the first frame
+        threads: Decoder threads, 0 for FFmpeg's default (all cores)
+        
+    Yields:
+        Frame index and BGR image of each decoded frame
+    """
+    with av.open(video_file) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = 'AUTO'
+        if threads:
+            stream.codec_context.thread_count = threads
+        
+        frame_index = -1
+        seek_pts = None
+        if seek is not None and seek[0] > 0:
+            frame_index = seek[0] - 1
+            seek_pts = seek[1]
+            container.seek(seek_pts, stream=stream)
+        for frame in container.decode(stream):
+            # Leading frames of an open GOP belong before the keyframe
+            if seek_pts is not None and frame.pts is not None and frame.pts < seek_pts:
+                continue
+            frame_index += 1
+            if frame_index < start:
+                continue
+            if frame_index > end:
+                break
+            yield frame_index, frame.to_ndarray(format='bgr24')
+
+
+def _extract_frame_chunk(video_file: str, frames_dir: str, start: int, end: int,
+                         writer_threads: int = FRAME_WRITER_THREADS,
+                         seek: Optional[Tuple[int, int]] = None,
+                         decoder_threads: int = 0) -> int:
+    """
+    Extract frames start..end (inclusive) of a video as PNG images
+    
+    Runs in a worker process with its own decoder, PyAV when installed and
+    OpenCV otherwise. Decoding happens on the calling thread while PNG
+    encoding runs on writer threads, connected by a bounded queue that caps
+    how many frames are held in memory.
+    
+    Args:
+        video_file: Video file path
+        frames_dir: Directory the frames are written to
+        start: First frame index
+        end: Last frame index
+        writer_threads: Number of PNG encoding threads
+        seek: Keyframe (frame index, pts) at or before start, or None to
+            decode from the first frame, see _decode_frames_av
+        decoder_threads: Decoder threads, 0 for the decoder's default
+        
+    Returns:
+        Number of frames written
+    """
+    decode = _decode_frames_av if av is not None else _decode_frames_cv2
+    decoded = decode(video_file, start, end, seek, decoder_threads)
+    
+    extracted = 0
+    frames = queue.Queue(maxsize=FRAME_PREFETCH)
+    writers = ThreadPoolExecutor(max_workers=writer_threads)
+    results = [writers.submit(_write_frames, frames, frames_dir)
+               for _ in range(writer_threads)]
+    try:
+        for frame_index, frame in decoded:
+            frames.put((frame_index, frame))
+            extracted += 1
+    finally:
+        decoded.close()
+        for _ in results:
+            frames.put(None)
+        writers.shutdown()
+    
+    for result in results:
+        error = result.result()
+        if error is not None:
+            raise error
+    return extracted
+
+
+def _probe_video(video_file: str) -> Optional[Dict[str, Any]]:
+    """
+    Read frame count, frame rate and size from the container metadata
+    
+    Tries PyAV, then ffprobe. Neither decodes any frames.
+    
+    Args:
+        video_file: Video file path
+        
+    Returns:
+        Dict with total_frames, fps, width and height, or None if neither
+        tool is available or the metadata is incomplete
+    """
+    if av is not None:
+        try:
+            with av.open(video_file) as container:
+                stream = container.streams.video[0]
+                fps = float(stream.average_rate or 0)
+                total_frames = stream.frames
+                if not total_frames and stream.duration is not None:
+                    total_frames = round(stream.duration * stream.time_base * fps)
+                if total_frames and fps:
+                    return {
+                        'total_frames': int(total_frames),
+                        'fps': fps,
+                        'width': stream.codec_context.width,
+                        'height': stream.codec_context.height
+                    }
+        except Exception:
+            pass
+    
+    if shutil.which('ffprobe') is not None:
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries',
+                 'stream=nb_frames,avg_frame_rate,r_frame_rate,duration,width,height',
+                 '-of', 'json', video_file],
+                capture_output=True, text=True, check=True
+            )
+            stream = json.loads(result.stdout)['streams'][0]
+            rate = stream.get('avg_frame_rate', '0/0')
+            if rate.endswith('/0'):
+                rate = stream.get('r_frame_rate', '0/1')
+            fps = float(Fraction(rate))
+            nb_frames = stream.get('nb_frames', 'N/A')
+            total_frames = int(nb_frames) if nb_frames.isdigit() else 0
+            duration = stream.get('duration', 'N/A')
+            if not total_frames and duration != 'N/A':
+                total_frames = round(float(duration) * fps)
+            if total_frames and fps:
+                return {
+                    'total_frames': total_frames,
+                    'fps': fps,
+                    'width': int(stream['width']),
+                    'height': int(stream['height'])
+                }
+        except (OSError, subprocess.CalledProcessError, ValueError, KeyError, IndexError, ZeroDivisionError):
+            pass
+    
+    return None
+
+
+def _keyframe_indices(video_file: str) -> Tuple[List[Tuple[int, int]], bool]:
+    """
+    List the keyframes of a video with their frame indices
+    
+    Uses PyAV when installed, otherwise ffprobe. Only packet headers are
+    read, nothing is decoded. A keyframe's index is the position of its
+    timestamp among all packet timestamps, which is its position in
+    sequential decoding whether or not the frame rate is constant.
+    
+    Args:
+        video_file: Video file path
+        
+    Returns:
+        (frame index, pts) of each keyframe in order, with pts in stream
+        time base units, and whether the frames are evenly spaced in time.
+        ([], False) if neither tool is available, fails, or a packet has
+        no timestamp
+    """
+    pts = []
+    key_pts = []
+    if av is not None:
+        try:
+            with av.open(video_file) as container:
+                stream = container.streams.video[0]
+                for packet in container.demux(stream):
+                    if not packet.size:
+                        # Flush packet at the end of the stream
+                        continue
+                    if packet.pts is None:
+                        return [], False
+                    pts.append(packet.pts)
+                    if packet.is_keyframe:
+                        key_pts.append(packet.pts)
+        except Exception:
+            pts.clear()
+            key_pts.clear()
+    
+    if not pts:
+        if shutil.which('ffprobe') is None:
+            return [], False
+        
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'packet=pts,flags', '-of', 'csv=p=0', video_file],
+                capture_output=True, text=True, check=True
+            )
+            for line in result.stdout.splitlines():
+                packet_pts, _, flags = line.partition(',')
+                pts.append(int(packet_pts))
+                if 'K' in flags:
+                    key_pts.append(pts[-1])
+        except (OSError, subprocess.CalledProcessError, ValueError):
+            return [], False
+    
+    if not key_pts:
+        return [], False
+    
+    pts.sort()
+    keyframes = [(bisect.bisect_left(pts, p), p) for p in sorted(set(key_pts))]
+    # Allow one tick of rounding jitter between frame timestamps
+    steps = np.diff(pts)
+    constant_rate = len(steps) == 0 or int(steps.max() - steps.min()) <= 1
+    return keyframes, constant_rate
+
+
+def _split_frame_range(start: int, end: int, workers: int, 
+                       keyframes: List[int]) -> List[Tuple[int, int]]:
+    """
+    Split start..end (inclusive) into contiguous chunks starting on keyframes
+    
+    Each even split point is moved forward to the next keyframe, so workers
+    can seek straight to their first frame.
+    
+    Args:
+        start: First frame index
+        end: Last frame index
+        workers: Number of chunks wanted
+        keyframes: Sorted keyframe indices
+        
+    Returns:
+        List of (first, last) frame index pairs
+    """
+    total = end - start + 1
+    
+    bounds = [start]
+    for i in range(1, workers):
+        bound = start + total * i // workers
+        pos = bisect.bisect_left(keyframes, bound)
+        bound = keyframes[pos] if pos < len(keyframes) else end + 1
+        if bounds[-1] < bound <= end:
+            bounds.append(bound)
+    bounds.append(end + 1)
+    
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(len(bounds) - 1)]
 
 
 class CVATToDeepLabCutPipeline:
     """Complete CVAT to DeepLabCut conversion pipeline"""
     
     def __init__(self):
-        self.annotations = {}
         self.video_info = {}
         self.bodyparts = []
+        # Annotations as arrays: sorted frame numbers, and an (x, y) pair
+        # per frame and bodypart with NaN where a point is unannotated
+        self.frame_ids = np.empty(0, dtype=np.int64)
+        self.coords = np.empty((0, 0, 2))
         self.frame_selection = "full"
         self.frame_range = (0, -1)
+        # labeled-data directory of the current video, see _get_labeled_data_dir
+        self._labeled_data_key = None
+        self._video_name = None
+        self._labeled_data_dir = None
+        
+    def _get_labeled_data_dir(self, output_dir: str, video_file: Optional[str] = None) -> Path:
+        """
+        Get the video's labeled-data directory, creating it on first use
+        
+        Args:
+            output_dir: Output directory
+            video_file: Video file path, defaults to the one in video_info
+            
+        Returns:
+            Path of labeled-data/<video name> inside the output directory
+        """
+        video_file = video_file or self.video_info['video_file']
+        key = (os.fspath(output_dir), os.fspath(video_file))
+        if key != self._labeled_data_key:
+            self._video_name = Path(video_file).stem  # Video filename without extension
+            self._labeled_data_dir = Path(output_dir) / "labeled-data" / self._video_name
+            self._labeled_data_dir.mkdir(parents=True, exist_ok=True)
+            self._labeled_data_key = key
+        return self._labeled_data_dir
+        
+    def _frame_range_rows(self) -> slice:
+        """
+        Get the annotation rows inside the selected frame range
+        
+        Returns:
+            Slice of frame_ids and coords covering the frame range
+        """
+        start_frame, end_frame = self.frame_range
+        # frame_ids is sorted, so the range is one contiguous slice
+        lo = np.searchsorted(self.frame_ids, start_frame, side='left')
+        hi = np.searchsorted(self.frame_ids, end_frame, side='right')
+        return slice(int(lo), int(hi))
         
     def parse_cvat_xml(self, xml_file: str) -> bool:
         """
@@ -52,90 +695,131 @@ class CVATToDeepLabCutPipeline:
         Returns:
             Whether parsing was successful
         """
-        print(f"📄 Parsing CVAT XML file: {xml_file}")
+        logger.info(f"📄 Parsing CVAT XML file: {xml_file}")
+        
+        # Parse annotation data as flat point records (frame, bodypart
+        # code, x, y), laid out as arrays once the whole file is read
+        point_frames = array('q')
+        point_codes = array('q')
+        point_xy = array('d')
+        bodypart_codes = {}
+        bodyparts_set = set()
         
+        # Stream the file instead of building the whole tree, clearing each
+        # track once it is processed so memory stays bounded by one track
+        in_track = False
+        label = None
         try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
-        except ET.ParseError as e:
-            print(f"❌ XML parsing error: {e}")
+            for event, elem in ET.iterparse(xml_file, events=('start', 'end'), **ITERPARSE_OPTIONS):
+                tag = elem.tag
+                if event == 'start':
+                    if tag == 'track':
+                        # The label is constant within a track, so its
+                        # bodypart names are registered once when it closes
+                        in_track = True
+                        label = elem.get('label')
+                        center_name = f"{label}_center"
+                        center_code = bodypart_codes.setdefault(center_name, len(bodypart_codes))
+                        label_code = bodypart_codes.setdefault(label, len(bodypart_codes))
+                        has_box = has_points = False
+                        logger.info(f"🔍 Processing Track {elem.get('id')}: {label}")
+                    continue
+                
+                if tag == 'box' and in_track:
+                    # Process box annotations (bounding boxes)
+                    attrib = elem.attrib
+                    frame_num = int(attrib['frame'])
+                    
+                    # Calculate center point coordinates
+                    center_x = (float(attrib['xtl']) + float(attrib['xbr'])) / 2
+                    center_y = (float(attrib['ytl']) + float(attrib['ybr'])) / 2
+                    
+                    # Store as center point
+                    point_frames.append(frame_num)
+                    point_codes.append(center_code)
+                    point_xy.append(center_x)
+                    point_xy.append(center_y)
+                    has_box = True
+                    
+                elif tag == 'points' and in_track:
+                    # Process points annotations (keypoints)
+                    attrib = elem.attrib
+                    frame_num = int(attrib['frame'])
+                    
+                    # Parse point coordinates
+                    points_str = attrib.get('points')
+                    if points_str:
+                        coords = points_str.split(',')
+                        if len(coords) >= 2:
+                            x = float(coords[0])
+                            y = float(coords[1])
+                            point_frames.append(frame_num)
+                            point_codes.append(label_code)
+                            point_xy.append(x)
+                            point_xy.append(y)
+                            has_points = True
+                    
+                elif tag == 'track':
+                    if has_box:
+                        bodyparts_set.add(center_name)
+                    if has_points:
+                        bodyparts_set.add(label)
+                    in_track = False
+                    elem.clear()
+                    # lxml can also drop the cleared elements from the root
+                    if hasattr(elem, 'getprevious'):
+                        while elem.getprevious() is not None:
+                            del elem.getparent()[0]
+                    
+                elif tag == 'meta':
+                    # Extract meta information
+                    job = elem.find('job')
+                    if job is not None:
+                        size_elem = job.find('size')
+                        start_frame_elem = job.find('start_frame')
+                        stop_frame_elem = job.find('stop_frame')
+                        
+                        self.video_info = {
+                            'total_frames': int(size_elem.text) if size_elem is not None else 0,
+                            'start_frame': int(start_frame_elem.text) if start_frame_elem is not None else 0,
+                            'stop_frame': int(stop_frame_elem.text) if stop_frame_elem is not None else 0
+                        }
+                        
+                        logger.info(f"📊 Video info: Total frames={self.video_info['total_frames']}, "
+                              f"Start frame={self.video_info['start_frame']}, "
+                              f"End frame={self.video_info['stop_frame']}")
+                    elem.clear()
+        except XMLParseError as e:
+            logger.error(f"❌ XML parsing error: {e}")
             return False
         except FileNotFoundError:
-            print(f"❌ File not found: {xml_file}")
+            logger.error(f"❌ File not found: {xml_file}")
             return False
         
-        # Extract meta information
-        meta = root.find('meta')
-        if meta is not None:
-            job = meta.find('job')
-            if job is not None:
-                size_elem = job.find('size')
-                start_frame_elem = job.find('start_frame')
-                stop_frame_elem = job.find('stop_frame')
-                
-                self.video_info = {
-                    'total_frames': int(size_elem.text) if size_elem is not None else 0,
-                    'start_frame': int(start_frame_elem.text) if start_frame_elem is not None else 0,
-                    'stop_frame': int(stop_frame_elem.text) if stop_frame_elem is not None else 0
-                }
-                
-                print(f"📊 Video info: Total frames={self.video_info['total_frames']}, "
-                      f"Start frame={self.video_info['start_frame']}, "
-                      f"End frame={self.video_info['stop_frame']}")
+        self.bodyparts = sorted(list(bodyparts_set))
         
-        # Parse annotation data
-        self.annotations = {}
-        bodyparts_set = set()
+        # Lay the annotations out as dense arrays for the writers: one row
+        # per annotated frame, one column per bodypart in sorted order
+        point_frames = np.frombuffer(point_frames, dtype=np.int64)
+        self.frame_ids = np.unique(point_frames)
+        self.coords = np.full((len(self.frame_ids), len(self.bodyparts), 2), np.nan)
+        bp_index = {bodypart: i for i, bodypart in enumerate(self.bodyparts)}
+        column_of_code = np.zeros(len(bodypart_codes), dtype=np.int64)
+        for bodypart, code in bodypart_codes.items():
+            # Codes of names never stored (a track without boxes has no
+            # center point) have no records, so any column will do
+            column_of_code[code] = bp_index.get(bodypart, 0)
+        rows = np.searchsorted(self.frame_ids, point_frames)
+        columns = column_of_code[np.frombuffer(point_codes, dtype=np.int64)]
+        # A later annotation of the same frame and bodypart wins, so keep
+        # only the last occurrence of each (row, column) before scattering
+        cells = (rows * len(self.bodyparts) + columns)[::-1]
+        _, last = np.unique(cells, return_index=True)
+        last = len(cells) - 1 - last
+        self.coords[rows[last], columns[last]] = np.frombuffer(point_xy).reshape(-1, 2)[last]
         
-        # Iterate through all tracks
-        for track in root.findall('track'):
-            track_id = track.get('id')
-            label = track.get('label')
-            
-            print(f"🔍 Processing Track {track_id}: {label}")
-            
-            # Process box annotations (bounding boxes)
-            for box in track.findall('box'):
-                frame_num = int(box.get('frame'))
-                
-                if frame_num not in self.annotations:
-                    self.annotations[frame_num] = {}
-                
-                # Extract bounding box information
-                xtl = float(box.get('xtl'))
-                ytl = float(box.get('ytl'))
-                xbr = float(box.get('xbr'))
-                ybr = float(box.get('ybr'))
-                
-                # Calculate center point coordinates
-                center_x = (xtl + xbr) / 2
-                center_y = (ytl + ybr) / 2
-                
-                # Store as center point
-                bodypart_name = f"{label}_center"
-                self.annotations[frame_num][bodypart_name] = (center_x, center_y)
-                bodyparts_set.add(bodypart_name)
-            
-            # Process points annotations (keypoints)
-            for point in track.findall('points'):
-                frame_num = int(point.get('frame'))
-                
-                if frame_num not in self.annotations:
-                    self.annotations[frame_num] = {}
-                
-                # Parse point coordinates
-                points_str = point.get('points')
-                if points_str:
-                    coords = points_str.split(',')
-                    if len(coords) >= 2:
-                        x = float(coords[0])
-                        y = float(coords[1])
-                        self.annotations[frame_num][label] = (x, y)
-                        bodyparts_set.add(label)
-        
-        self.bodyparts = sorted(list(bodyparts_set))
-        print(f"✅ Detected keypoints: {self.bodyparts}")
-        print(f"📊 Parsing completed: {len(self.annotations)} frames of annotation data")
+        logger.info(f"✅ Detected keypoints: {self.bodyparts}")
+        logger.info(f"📊 Parsing completed: {len(self.frame_ids)} frames of annotation data")
         
         return True
     
@@ -149,34 +833,35 @@ class CVATToDeepLabCutPipeline:
         Returns:
             Whether information was successfully obtained
         """
-        print(f"🎥 Getting video information: {video_file}")
+        logger.info(f"🎥 Getting video information: {video_file}")
         
         try:
-            cap = cv2.VideoCapture(video_file)
-            if not cap.isOpened():
-                print(f"❌ Cannot open video file: {video_file}")
-                return False
-            
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            
-            self.video_info.update({
-                'total_frames': total_frames,
-                'fps': fps,
-                'width': width,
-                'height': height,
-                'video_file': video_file
-            })
-            
-            cap.release()
-            
-            print(f"📊 Video info: {total_frames} frames, {fps:.2f}FPS, {width}x{height}")
+            # Container metadata is cheap to read; only open the video with
+            # OpenCV when neither PyAV nor ffprobe can provide it
+            info = _probe_video(video_file)
+            if info is None:
+                cap = cv2.VideoCapture(video_file)
+                if not cap.isOpened():
+                    logger.error(f"❌ Cannot open video file: {video_file}")
+                    return False
+                
+                info = {
+                    'total_frames': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+                    'fps': cap.get(cv2.CAP_PROP_FPS),
+                    'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                    'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                }
+                cap.release()
+            
+            total_frames, fps = info['total_frames'], info['fps']
+            width, height = info['width'], info['height']
+            self.video_info.update(info, video_file=video_file)
+            
+            logger.info(f"📊 Video info: {total_frames} frames, {fps:.2f}FPS, {width}x{height}")
             return True
             
         except Exception as e:
-            print(f"❌ Failed to get video information: {e}")
+            logger.error(f"❌ Failed to get video information: {e}")
             return False
     
     def interactive_frame_selection(self):
@@ -227,51 +912,80 @@ class CVATToDeepLabCutPipeline:
         Returns:
             Whether extraction was successful
         """
-        print(f"🎞️ Extracting frames from video...")
+        logger.info(f"🎞️ Extracting frames from video...")
         
         # Create labeled-data directory, extracted frames go here
-        video_name = Path(video_file).stem  # Get video filename without extension
-        frames_dir = Path(output_dir) / "labeled-data" / video_name
-        frames_dir.mkdir(parents=True, exist_ok=True)
+        frames_dir = self._get_labeled_data_dir(output_dir, video_file)
         
         try:
-            cap = cv2.VideoCapture(video_file)
-            if not cap.isOpened():
-                print(f"❌ Cannot open video file: {video_file}")
-                return False
-            
             start_frame, end_frame = self.frame_range
-            frame_count = 0
-            extracted_count = 0
+            logger.info(f"📊 Extracting frame range: {start_frame} - {end_frame}")
             
-            print(f"📊 Extracting frame range: {start_frame} - {end_frame}")
+            # Frames are independent, so split the range into contiguous
+            # keyframe-aligned chunks and decode/encode them in parallel
+            # worker processes
+            total = end_frame - start_frame + 1
+            workers = max(1, min(os.cpu_count() or 1, total // MIN_FRAMES_PER_WORKER))
+            chunks = [(start_frame, end_frame)]
+            keyframes = []
+            if workers > 1 or start_frame > 0:
+                keyframes, constant_rate = _keyframe_indices(video_file)
+                # OpenCV can only seek to the right frame at a constant
+                # frame rate, PyAV counts frames from the keyframe instead
+                if av is None and not constant_rate:
+                    keyframes = []
+                if av is None and shutil.which('ffprobe') is None:
+                    logger.info("  No keyframe probe (PyAV/ffprobe) available, "
+                                "decoding sequentially from the first frame")
+                elif not keyframes:
+                    logger.info("  No usable keyframe index (variable frame rate or no timestamps), "
+                                "decoding sequentially from the first frame")
+            keyframe_indices = [index for index, _ in keyframes]
+            if workers > 1 and keyframes:
+                chunks = _split_frame_range(start_frame, end_frame, workers, keyframe_indices)
             
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if start_frame <= frame_count <= end_frame:
-                    # Save frame, ensure filename corresponds to annotation data
-                    frame_filename = f"frame_{frame_count:04d}.png"
-                    frame_path = frames_dir / frame_filename
-                    cv2.imwrite(str(frame_path), frame)
-                    extracted_count += 1
-                    
-                    if extracted_count % 10 == 0:
-                        print(f"  Extracted {extracted_count} frames...")
-                
-                frame_count += 1
-                
-                if frame_count > end_frame:
-                    break
+            def seek_for(start: int) -> Optional[Tuple[int, int]]:
+                # Last keyframe at or before start
+                pos = bisect.bisect_right(keyframe_indices, start) - 1
+                return keyframes[pos] if pos >= 0 else None
+            
+            # Share the cores between the worker processes: each decoder
+            # gets its share instead of FFmpeg's default of all cores, and
+            # spare cores go to extra PNG encoding threads, since
+            # cv2.imencode releases the GIL
+            cores_per_worker = max(1, (os.cpu_count() or 1) // len(chunks))
+            writer_threads = min(MAX_FRAME_WRITER_THREADS,
+                                 max(FRAME_WRITER_THREADS, cores_per_worker))
+            
+            extracted_count = 0
+            if len(chunks) == 1:
+                extracted_count = _extract_frame_chunk(video_file, str(frames_dir), start_frame, end_frame,
+                                                       writer_threads, seek_for(start_frame), cores_per_worker)
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(_extract_frame_chunk, video_file, str(frames_dir), start, end,
+                                               writer_threads, seek_for(start), cores_per_worker)
+                               for start, end in chunks]
+                    # Show a progress bar on a terminal; piped output (e.g. the
+                    # GUI) gets one log line per finished chunk instead
+                    progress = None
+                    if tqdm is not None and sys.stderr.isatty():
+                        progress = tqdm(total=total, unit='frame', mininterval=0.5)
+                    for future in as_completed(futures):
+                        count = future.result()
+                        extracted_count += count
+                        if progress is not None:
+                            progress.update(count)
+                        else:
+                            logger.info(f"  Extracted {extracted_count} frames...")
+                    if progress is not None:
+                        progress.close()
             
-            cap.release()
-            print(f"✅ Successfully extracted {extracted_count} frames to: {frames_dir}")
+            logger.info(f"✅ Successfully extracted {extracted_count} frames to: {frames_dir}")
             return True
             
         except Exception as e:
-            print(f"❌ Frame extraction failed: {e}")
+            logger.error(f"❌ Frame extraction failed: {e}")
             return False
     
     def create_deeplabcut_csv(self, output_dir: str, scorer: str = "manual", 
@@ -287,66 +1001,36 @@ class CVATToDeepLabCutPipeline:
         Returns:
             Whether creation was successful
         """
-        print(f"📊 Creating DeepLabCut CSV file...")
+        logger.info(f"📊 Creating DeepLabCut CSV file...")
         
         # Create labeled-data directory structure, using video filename
-        video_name = Path(self.video_info['video_file']).stem
-        labeled_data_dir = Path(output_dir) / "labeled-data" / video_name
-        labeled_data_dir.mkdir(parents=True, exist_ok=True)
+        labeled_data_dir = self._get_labeled_data_dir(output_dir)
+        video_name = self._video_name
         
         csv_file = labeled_data_dir / f"CollectedData_{scorer}.csv"
         
         # Get annotation data within frame range
         start_frame, end_frame = self.frame_range
-        valid_frames = []
-        for frame_num in sorted(self.annotations.keys()):
-            if start_frame <= frame_num <= end_frame:
-                valid_frames.append(frame_num)
+        rows = self._frame_range_rows()
+        valid_frames = self.frame_ids[rows]
         
-        if not valid_frames:
-            print(f"❌ No annotation data found in frame range {start_frame}-{end_frame}")
+        if not len(valid_frames):
+            logger.error(f"❌ No annotation data found in frame range {start_frame}-{end_frame}")
             return False
         
-        print(f"📊 Found {len(valid_frames)} frames of annotation data in range")
+        logger.info(f"📊 Found {len(valid_frames)} frames of annotation data in range")
         
-        # Create CSV following BeePose format
-        # First row: scorer
-        scorer_row = ['scorer', '', ''] + [scorer] * (len(self.bodyparts) * 2)
+        # Create CSV following BeePose format: scorer, bodyparts and coords rows
+        scorer_row, bodyparts_row, coords_row = _dlc_header(self.bodyparts, scorer)
         
-        # Second row: bodyparts
-        bodyparts_row = ['bodyparts', '', '']
-        for bodypart in self.bodyparts:
-            bodyparts_row.extend([bodypart, bodypart])
-        
-        # Third row: coords
-        coords_row = ['coords', '', ''] + ['x', 'y'] * len(self.bodyparts)
-        
-        # Data rows
-        data_rows = []
-        for i, frame_num in enumerate(valid_frames):
-            # Build image filename, ensure it corresponds to extracted frames
-            image_name = f"frame_{frame_num:04d}.png"
-            
-            # Create data row: labeled-data, video_name, image_name, coordinates...
-            row = ['labeled-data', video_name, image_name]
-            
-            frame_annotations = self.annotations[frame_num]
-            
-            # Add coordinates for each keypoint
-            for bodypart in self.bodyparts:
-                if bodypart in frame_annotations:
-                    x, y = frame_annotations[bodypart]
-                    row.extend([x, y])
-                else:
-                    # Use NaN for unannotated points
-                    row.extend([np.nan, np.nan])
-            
-            data_rows.append(row)
+        # Coordinates of each frame as one flat x, y, x, y... row, with NaN
+        # for unannotated points
+        coords = self.coords[rows].reshape(len(valid_frames), -1)
+        frame_nums = valid_frames.tolist()
         
         # Write CSV file
         try:
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-                import csv
+            with open(csv_file, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
                 writer = csv.writer(f)
                 
                 # Write header rows
@@ -354,16 +1038,22 @@ class CVATToDeepLabCutPipeline:
                 writer.writerow(bodyparts_row)
                 writer.writerow(coords_row)
                 
-                # Write data rows
-                for row in data_rows:
-                    writer.writerow(row)
+                # Write data rows: labeled-data, video_name, image_name, coordinates...
+                # Image names must correspond to extracted frames. Rows are
+                # converted and written a chunk at a time to bound memory
+                for i in range(0, len(frame_nums), CSV_CHUNK_ROWS):
+                    writer.writerows(
+                        ['labeled-data', video_name, f"frame_{frame_num:04d}.png"] + row
+                        for frame_num, row in zip(frame_nums[i:i + CSV_CHUNK_ROWS],
+                                                  coords[i:i + CSV_CHUNK_ROWS].tolist())
+                    )
             
-            print(f"✅ Successfully created CSV file: {csv_file}")
-            print(f"📊 CSV statistics: {len(data_rows)} frames, {len(self.bodyparts)} keypoints")
+            logger.info(f"✅ Successfully created CSV file: {csv_file}")
+            logger.info(f"📊 CSV statistics: {len(coords)} frames, {len(self.bodyparts)} keypoints")
             return True
             
         except Exception as e:
-            print(f"❌ CSV file creation failed: {e}")
+            logger.error(f"❌ CSV file creation failed: {e}")
             return False
     
     def create_deeplabcut_config(self, output_dir: str, project_name: str = "BeePoseEstimation",
@@ -379,7 +1069,7 @@ class CVATToDeepLabCutPipeline:
         Returns:
             Whether creation was successful
         """
-        print(f"⚙️ Creating DeepLabCut configuration file...")
+        logger.info(f"⚙️ Creating DeepLabCut configuration file...")
         
         config_file = Path(output_dir) / "config.yaml"
         
@@ -423,26 +1113,7 @@ class CVATToDeepLabCutPipeline:
             'numframes2pick': 20,
             
             # Plotting configuration
-            'skeleton': [
-                # Queen bee skeleton
-                ['Q_Head', 'Q_Neck'],
-                ['Q_Neck', 'Q_Tail'],
-                ['Q_Antenna_L1', 'Q_Antenna_L2'],
-                ['Q_Antenna_L2', 'Q_Antenna_L3'],
-                ['Q_Antenna_L3', 'Q_Head'],
-                ['Q_Antenna_R1', 'Q_Antenna_R2'],
-                ['Q_Antenna_R2', 'Q_Antenna_R3'],
-                ['Q_Antenna_R3', 'Q_Head'],
-                # Other bee skeleton (template individual)
-                ['O_Head', 'O_Neck'],
-                ['O_Neck', 'O_Tail'],
-                ['O_Antenna_L1', 'O_Antenna_L2'],
-                ['O_Antenna_L2', 'O_Antenna_L3'],
-                ['O_Antenna_L3', 'O_Head'],
-                ['O_Antenna_R1', 'O_Antenna_R2'],
-                ['O_Antenna_R2', 'O_Antenna_R3'],
-                ['O_Antenna_R3', 'O_Head']
-            ],
+            'skeleton': SKELETON,
             'skeleton_color': 'blue',
             'pcutoff': 0.4,
             'dotsize': 12,
@@ -476,108 +1147,53 @@ class CVATToDeepLabCutPipeline:
         }
         
         try:
-            with open(config_file, 'w', encoding='utf-8') as f:
+            with open(config_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
                 # Write comments and configuration, mimicking BeePose format
-                f.write("# Project definitions (do not edit)\n")
-                f.write(f"Task: {config_data['Task']}\n")
-                f.write(f"scorer: {config_data['scorer']}\n")
-                f.write(f"date: {config_data['date']}\n")
-                f.write("multianimalproject:\n")
-                f.write("identity:\n\n\n")
-                
-                f.write("# Project path (change when moving around)\n")
-                f.write(f"project_path: {config_data['project_path']}\n\n\n")
-                
-                f.write("# Default DeepLabCut engine to use for shuffle creation (either pytorch or tensorflow)\n")
-                f.write(f"engine: {config_data['engine']}\n\n\n")
-                
-                f.write("# Annotation data set configuration (and individual video cropping parameters)\n")
-                f.write("video_sets:\n")
-                f.write(f"  {video_filename}:\n")
-                f.write("    crop: false\n\n")
-                f.write("# Other settings\n")
-                
-                f.write("bodyparts:\n")
-                for bodypart in self.bodyparts:
-                    f.write(f"- {bodypart}\n")
-                f.write("\n\n\n")
-                
-                f.write(f"start: {config_data['start']}\n")
-                f.write(f"stop: {config_data['stop']}\n")
-                f.write(f"numframes2pick: {config_data['numframes2pick']}\n\n\n")
-                
-                f.write("# Plotting configuration\n")
-                f.write("skeleton:\n")
-                f.write("  # Queen bee skeleton\n")
-                f.write("  - [Q_Head, Q_Neck]\n")
-                f.write("  - [Q_Neck, Q_Tail]\n")
-                f.write("  - [Q_Antenna_L1, Q_Antenna_L2]\n")
-                f.write("  - [Q_Antenna_L2, Q_Antenna_L3]\n")
-                f.write("  - [Q_Antenna_L3, Q_Head]\n")
-                f.write("  - [Q_Antenna_R1, Q_Antenna_R2]\n")
-                f.write("  - [Q_Antenna_R2, Q_Antenna_R3]\n")
-                f.write("  - [Q_Antenna_R3, Q_Head]\n")
-                f.write("\n")
-                f.write("  # Other bee skeleton (template individual)\n")
-                f.write("  - [O_Head, O_Neck]\n")
-                f.write("  - [O_Neck, O_Tail]\n")
-                f.write("  - [O_Antenna_L1, O_Antenna_L2]\n")
-                f.write("  - [O_Antenna_L2, O_Antenna_L3]\n")
-                f.write("  - [O_Antenna_L3, O_Head]\n")
-                f.write("  - [O_Antenna_R1, O_Antenna_R2]\n")
-                f.write("  - [O_Antenna_R2, O_Antenna_R3]\n")
-                f.write("  - [O_Antenna_R3, O_Head]\n")
-                f.write(f"skeleton_color: {config_data['skeleton_color']}\n")
-                f.write(f"pcutoff: {config_data['pcutoff']}\n")
-                f.write(f"dotsize: {config_data['dotsize']}\n")
-                f.write(f"alphavalue: {config_data['alphavalue']}\n")
-                f.write(f"colormap: {config_data['colormap']}\n\n\n")
-                
-                f.write("# Training,Evaluation and Analysis configuration\n")
-                f.write(f"TrainingFraction: {config_data['TrainingFraction']}\n")
-                f.write(f"iteration: {config_data['iteration']}\n")
-                f.write(f"default_net_type: {config_data['default_net_type']}\n")
-                f.write(f"default_augmenter: {config_data['default_augmenter']}\n")
-                f.write(f"snapshotindex: {config_data['snapshotindex']}\n")
-                f.write(f"detector_snapshotindex: {config_data['detector_snapshotindex']}\n")
-                f.write(f"batch_size: {config_data['batch_size']}\n")
-                f.write(f"detector_batch_size: {config_data['detector_batch_size']}\n\n\n")
-                
-                f.write("# Cropping Parameters (for analysis and outlier frame detection)\n")
-                f.write("cropping:\n")
-                f.write("#if cropping is true for analysis, then set the values here:\n")
-                f.write("x1:\n")
-                f.write("x2:\n")
-                f.write("y1:\n")
-                f.write("y2:\n\n\n")
-                
-                f.write("# Refinement configuration (parameters from annotation dataset configuration also relevant in this stage)\n")
-                f.write("corner2move2:\n")
-                f.write("move2corner:\n\n\n")
-                
-                f.write("# Conversion tables to fine-tune SuperAnimal weights\n")
-                f.write("SuperAnimalConversionTables:\n")
-                f.write(f"project_name: {config_data['project_name']}\n")
+                for blank_lines, comment, keys, flow_style in CONFIG_SECTIONS:
+                    f.write("\n" * blank_lines)
+                    if comment:
+                        f.write(f"{comment}\n")
+                    for is_comment, run in itertools.groupby(keys, key=lambda key: key.startswith('#')):
+                        run = list(run)
+                        if is_comment:
+                            f.write("".join(f"{line}\n" for line in run))
+                            continue
+                        if run[0] == 'skeleton':
+                            # Written per group so each keeps its comment,
+                            # indented under the key like the template
+                            f.write("skeleton:\n")
+                            for j, (group_comment, edges) in enumerate(SKELETON_GROUPS):
+                                if j:
+                                    f.write("\n")
+                                f.write(f"  {group_comment}\n")
+                                f.write(textwrap.indent(
+                                    yaml.dump(edges, Dumper=_ConfigDumper, default_flow_style=None), "  "))
+                            run = run[1:]
+                        if run:
+                            yaml.dump({key: config_data[key] for key in run}, f, Dumper=_ConfigDumper,
+                                      sort_keys=False, default_flow_style=flow_style)
             
-            print(f"✅ Successfully created configuration file: {config_file}")
+            logger.info(f"✅ Successfully created configuration file: {config_file}")
             return True
             
         except Exception as e:
-            print(f"❌ Configuration file creation failed: {e}")
+            logger.error(f"❌ Configuration file creation failed: {e}")
             return False
     
-    def copy_video_to_project(self, video_file: str, output_dir: str) -> bool:
+    def copy_video_to_project(self, video_file: str, output_dir: str,
+                              stop: Optional[threading.Event] = None) -> bool:
         """
         Copy video file to project's videos directory
         
         Args:
             video_file: Source video file path
             output_dir: Output directory
+            stop: Event that cancels the copy when set
             
         Returns:
             Whether copying was successful
         """
-        print(f"📹 Copying video file to project...")
+        logger.info(f"📹 Copying video file to project...")
         
         # Create videos directory
         videos_dir = Path(output_dir) / "videos"
@@ -588,16 +1204,24 @@ class CVATToDeepLabCutPipeline:
         destination = videos_dir / video_filename
         
         try:
-            shutil.copy2(video_file, destination)
-            print(f"✅ Video file copied to: {destination}")
+            copy_file_with_progress(video_file, destination, stop)
+            logger.info(f"✅ Video file copied to: {destination}")
             return True
+        except InterruptedError:
+            logger.info(f"⏹️ Video file copying cancelled")
+            return False
         except Exception as e:
-            print(f"❌ Video file copying failed: {e}")
+            logger.error(f"❌ Video file copying failed: {e}")
             return False
     
     def generate_h5_file(self, output_dir: str, scorer: str) -> bool:
         """
-        Generate DeepLabCut h5 file with automatic 'yes' response
+        Generate DeepLabCut h5 file from the annotation data
+        
+        The h5 file holds the same table as the CSV and is written directly
+        with pandas, the way deeplabcut.convertcsv2h5 does it, so the CSV is
+        not parsed again and no interactive prompt or deeplabcut import is
+        involved.
         
         Args:
             output_dir: Output directory
@@ -606,233 +1230,208 @@ class CVATToDeepLabCutPipeline:
         Returns:
             Whether generation was successful
         """
-        print(f"🔄 Generating h5 file...")
+        logger.info(f"🔄 Generating h5 file...")
+        
+        config_path = str(Path(output_dir) / "config.yaml")
+        h5_file = self._get_labeled_data_dir(output_dir) / f"CollectedData_{scorer}.h5"
         
         try:
-            import deeplabcut
-            config_path = str(Path(output_dir) / "config.yaml")
-            
-            # Method 1: Try to patch the input function to automatically answer 'yes'
-            try:
-                # Backup original input function
-                import builtins
-                original_input = builtins.input
-                
-                # Define our auto-yes input function
-                def auto_yes_input(prompt=''):
-                    print(f"{prompt}yes")  # Print the prompt and our response
-                    return 'yes'
-                
-                # Temporarily replace input function
-                builtins.input = auto_yes_input
-                
-                # Call the conversion function
-                deeplabcut.convertcsv2h5(config_path, scorer=scorer)
-                
-                # Restore original input function
-                builtins.input = original_input
-                
-                print(f"✅ Successfully generated h5 file")
-                return True
-                
-            except Exception as e1:
-                # Restore input function in case of error
-                try:
-                    builtins.input = original_input
-                except:
-                    pass
-                
-                # Method 2: Try using subprocess with input redirection
-                try:
-                    import subprocess
-                    import sys
-                    
-                    # Use our h5_converter utility script
-                    h5_converter_path = Path(__file__).parent / "h5_converter.py"
-                    
-                    if h5_converter_path.exists():
-                        # Use the dedicated converter script
-                        result = subprocess.run([
-                            sys.executable, str(h5_converter_path), config_path, scorer
-                        ], capture_output=True, text=True, timeout=120)
-                        
-                        if result.returncode == 0:
-                            print(f"✅ Successfully generated h5 file")
-                            return True
-                        else:
-                            print(f"⚠️ H5 converter output: {result.stdout}")
-                            if result.stderr:
-                                print(f"⚠️ H5 converter errors: {result.stderr}")
-                    
-                    # Fallback: direct subprocess call
-                    cmd = f'''
-import deeplabcut
-import builtins
-
-# Patch input function
-original_input = builtins.input
-builtins.input = lambda prompt='': 'yes'
-
-try:
-    deeplabcut.convertcsv2h5(r"{config_path}", scorer="{scorer}")
-    print("H5 conversion completed successfully")
-except Exception as e:
-    print(f"H5 conversion failed: {{e}}")
-finally:
-    builtins.input = original_input
-'''
-                    
-                    result = subprocess.run([
-                        sys.executable, '-c', cmd
-                    ], input='yes\n', text=True, capture_output=True, timeout=120)
-                    
-                    if result.returncode == 0:
-                        print(f"✅ Successfully generated h5 file")
-                        return True
-                    else:
-                        raise Exception(f"Subprocess method failed: {result.stderr}")
-                        
-                except Exception as e2:
-                    # Method 3: Last resort - try with environment variable
-                    try:
-                        import os
-                        os.environ['DLC_BATCH_MODE'] = '1'
-                        os.environ['PYTHONIOENCODING'] = 'utf-8'
-                        
-                        deeplabcut.convertcsv2h5(config_path, scorer=scorer)
-                        print(f"✅ Successfully generated h5 file")
-                        return True
-                        
-                    except Exception as e3:
-                        print(f"⚠️ Warning: H5 file generation encountered interactive prompt")
-                        print(f"   DeepLabCut is asking: 'Do you want to convert the csv file in folder: ... ?'")
-                        print(f"   Please manually run: deeplabcut.convertcsv2h5('{config_path}', scorer='{scorer}') and answer 'yes'")
-                        print(f"   Or use: python h5_converter.py '{config_path}' '{scorer}'")
-                        return True  # Not considered failure, just warning
-                        
-        except ImportError:
-            print("⚠️ Warning: Cannot import deeplabcut, skipping h5 file generation")
-            print("   Please install deeplabcut and run manually: deeplabcut.convertcsv2h5('config.yaml', scorer='your_scorer')")
-            return True  # Not considered failure, just warning
+            # Same layout deeplabcut.convertcsv2h5 produces: labeled-data,
+            # video, image rows under scorer/bodyparts/coords columns
+            rows = self._frame_range_rows()
+            frame_nums = self.frame_ids[rows].tolist()
+            scorer_row, bodyparts_row, coords_row = _dlc_header(self.bodyparts, scorer)
+            columns = pd.MultiIndex.from_arrays(
+                [scorer_row[3:], bodyparts_row[3:], coords_row[3:]],
+                names=[scorer_row[0], bodyparts_row[0], coords_row[0]])
+            index = pd.MultiIndex.from_arrays(
+                [['labeled-data'] * len(frame_nums), [self._video_name] * len(frame_nums),
+                 [f"frame_{frame_num:04d}.png" for frame_num in frame_nums]])
+            df = pd.DataFrame(self.coords[rows].reshape(len(frame_nums), -1),
+                              index=index, columns=columns)
+            df.to_hdf(h5_file, key='df_with_missing', mode='w')
+            logger.info(f"✅ Successfully generated h5 file: {h5_file}")
+        except ImportError as e:
+            # pandas needs PyTables to write h5 files
+            logger.warning(f"⚠️ Warning: Cannot write h5 file, skipping h5 file generation: {e}")
+            logger.warning(f"   Please install tables, or run manually: deeplabcut.convertcsv2h5('{config_path}', scorer='{scorer}')")
         except Exception as e:
-            print(f"❌ h5 file generation failed: {e}")
-            print("   Please run manually: deeplabcut.convertcsv2h5('config.yaml', scorer='your_scorer')")
-            return True  # Not considered failure, just warning
+            logger.error(f"❌ h5 file generation failed: {e}")
+            logger.error(f"   Please run manually: deeplabcut.convertcsv2h5('{config_path}', scorer='{scorer}')")
+        return True  # Not considered failure, just warning
     
     def create_dataset_summary(self, output_dir: str, project_name: str, scorer: str):
         """Create dataset summary file"""
         summary_file = Path(output_dir) / "dataset_summary.txt"
+        video_path = Path(self.video_info['video_file'])
+        video_name = video_path.stem
         
         start_frame, end_frame = self.frame_range
         total_selected_frames = end_frame - start_frame + 1
         
+        rows = self._frame_range_rows()
+        
+        # Assemble the whole summary first and write it in one call
+        summary = "\n".join([
+            f"DeepLabCut Dataset Summary",
+            f"=" * 50,
+            f"",
+            f"Project Name: {project_name}",
+            f"Scorer: {scorer}",
+            f"Processing Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"",
+            f"Source Data Information:",
+            f"  Video File: {self.video_info.get('video_file', 'N/A')}",
+            f"  Video Resolution: {self.video_info.get('width', 'N/A')}x{self.video_info.get('height', 'N/A')}",
+            f"  Video FPS: {self.video_info.get('fps', 'N/A'):.2f} FPS",
+            f"  Total Video Frames: {self.video_info.get('total_frames', 'N/A')}",
+            f"",
+            f"Processing Configuration:",
+            f"  Frame Selection Mode: {self.frame_selection}",
+            f"  Selected Frame Range: {start_frame}-{end_frame} (total {total_selected_frames} frames)",
+            f"  Valid Annotation Frames: {rows.stop - rows.start}",
+            f"",
+            f"Keypoint Information:",
+            f"  Number of Keypoints: {len(self.bodyparts)}",
+            f"  Keypoint List: {', '.join(self.bodyparts)}",
+            f"",
+            f"Output Files:",
+            f"  Project Directory: {output_dir}",
+            f"  Annotation CSV: labeled-data/{video_name}/CollectedData_{scorer}.csv",
+            f"  Annotation H5: labeled-data/{video_name}/CollectedData_{scorer}.h5",
+            f"  Configuration File: config.yaml",
+            f"  Video File: videos/{video_path.name}",
+            f"  Images Directory: labeled-data/{video_name}/",
+            f"",
+            f"DeepLabCut Usage Instructions:",
+            f"1. Check generated file integrity",
+            f"2. Adjust skeleton connections in config.yaml as needed",
+            f"3. Use this directory as DeepLabCut project for training",
+            f"",
+        ])
+        
         with open(summary_file, 'w', encoding='utf-8') as f:
-            f.write(f"DeepLabCut Dataset Summary\n")
-            f.write(f"=" * 50 + "\n\n")
-            f.write(f"Project Name: {project_name}\n")
-            f.write(f"Scorer: {scorer}\n")
-            f.write(f"Processing Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            f.write(f"Source Data Information:\n")
-            f.write(f"  Video File: {self.video_info.get('video_file', 'N/A')}\n")
-            f.write(f"  Video Resolution: {self.video_info.get('width', 'N/A')}x{self.video_info.get('height', 'N/A')}\n")
-            f.write(f"  Video FPS: {self.video_info.get('fps', 'N/A'):.2f} FPS\n")
-            f.write(f"  Total Video Frames: {self.video_info.get('total_frames', 'N/A')}\n\n")
-            
-            f.write(f"Processing Configuration:\n")
-            f.write(f"  Frame Selection Mode: {self.frame_selection}\n")
-            f.write(f"  Selected Frame Range: {start_frame}-{end_frame} (total {total_selected_frames} frames)\n")
-            f.write(f"  Valid Annotation Frames: {len([f for f in self.annotations.keys() if start_frame <= f <= end_frame])}\n\n")
-            
-            f.write(f"Keypoint Information:\n")
-            f.write(f"  Number of Keypoints: {len(self.bodyparts)}\n")
-            f.write(f"  Keypoint List: {', '.join(self.bodyparts)}\n\n")
-            
-            f.write(f"Output Files:\n")
-            f.write(f"  Project Directory: {output_dir}\n")
-            video_name = Path(self.video_info['video_file']).stem
-            f.write(f"  Annotation CSV: labeled-data/{video_name}/CollectedData_{scorer}.csv\n")
-            f.write(f"  Annotation H5: labeled-data/{video_name}/CollectedData_{scorer}.h5\n")
-            f.write(f"  Configuration File: config.yaml\n")
-            f.write(f"  Video File: videos/{Path(self.video_info['video_file']).name}\n")
-            f.write(f"  Images Directory: labeled-data/{video_name}/\n\n")
-            
-            f.write(f"DeepLabCut Usage Instructions:\n")
-            f.write(f"1. Check generated file integrity\n")
-            f.write(f"2. Adjust skeleton connections in config.yaml as needed\n")
-            f.write(f"3. Use this directory as DeepLabCut project for training\n")
-        
-        print(f"📄 Dataset summary saved: {summary_file}")
+            f.write(summary)
+        
+        logger.info(f"📄 Dataset summary saved: {summary_file}")
     
-    def run_pipeline(self, xml_file: str, video_file: str, output_dir: str,
-                    project_name: str = "BeePoseEstimation", scorer: str = "manual"):
+    def run_all(self, xml_file: str, video_file: str, output_dir: str,
+                scorer: str = "manual", project_name: str = "BeePoseEstimation",
+                frame_selection: Optional[str] = None,
+                frame_range: Optional[Tuple[int, int]] = None,
+                progress_cb: Optional[Callable[[str], None]] = None) -> bool:
         """
-        Run complete conversion pipeline
+        Run every conversion stage in order, stopping at the first failure
         
         Args:
             xml_file: CVAT XML file path
             video_file: Video file path
             output_dir: Output directory
-            project_name: Project name
             scorer: Scorer name
+            project_name: Project name
+            frame_selection: "full", "range", or None to ask interactively
+            frame_range: (start, end) frames used when frame_selection is "range"
+            progress_cb: Receives stage-level progress messages (default: logger)
+            
+        Returns:
+            Whether all stages were successful
         """
-        print("🐝 CVAT to DeepLabCut Conversion Pipeline")
-        print("=" * 60)
+        report = progress_cb or logger.info
+        # The video copy is pure I/O and needs nothing from the later
+        # stages, so it runs in the background while frames are extracted
+        copier = ThreadPoolExecutor(max_workers=1)
+        video_copy = None
+        stop_copy = threading.Event()
         
-        # Step 1: Parse XML file
-        if not self.parse_cvat_xml(xml_file):
-            print("❌ XML parsing failed, pipeline terminated")
-            return False
+        def select_frames() -> bool:
+            nonlocal video_copy
+            if frame_selection is None:
+                self.interactive_frame_selection()
+            elif frame_selection == "range":
+                self.frame_selection = "range"
+                self.frame_range = tuple(frame_range)
+            else:
+                self.frame_selection = "full"
+                self.frame_range = (0, self.video_info['total_frames'] - 1)
+            
+            report(f"📋 Frame selection: {self.frame_selection}")
+            if self.frame_selection == "range":
+                report(f"   Range: {self.frame_range[0]}-{self.frame_range[1]}")
+            
+            os.makedirs(output_dir, exist_ok=True)
+            video_copy = copier.submit(self.copy_video_to_project, video_file, output_dir, stop_copy)
+            return True
         
-        # Step 2: Get video information
-        if not self.get_video_info(video_file):
-            print("❌ Video information retrieval failed, pipeline terminated")
-            return False
+        def create_summary() -> bool:
+            self.create_dataset_summary(output_dir, project_name, scorer)
+            return True
         
-        # Step 3: Interactive frame selection
-        self.interactive_frame_selection()
+        # (name, stage) in order; each stage logs its own details
+        stages = [
+            ("XML parsing", partial(self.parse_cvat_xml, xml_file)),
+            ("Video information retrieval", partial(self.get_video_info, video_file)),
+            ("Frame selection", select_frames),
+            ("Frame extraction", partial(self.extract_frames, video_file, output_dir)),
+            ("CSV file creation", partial(self.create_deeplabcut_csv, output_dir, scorer, project_name)),
+            ("Configuration file creation", partial(self.create_deeplabcut_config, output_dir, project_name, scorer)),
+            ("Video file copying", lambda: video_copy.result()),
+            # H5 problems are only reported as warnings
+            ("H5 file generation", partial(self.generate_h5_file, output_dir, scorer)),
+            ("Dataset summary creation", create_summary),
+        ]
         
-        # Step 4: Extract video frames
-        if not self.extract_frames(video_file, output_dir):
-            print("❌ Frame extraction failed, pipeline terminated")
-            return False
+        try:
+            for name, stage in stages:
+                if not stage():
+                    (progress_cb or logger.error)(f"❌ {name} failed, pipeline terminated")
+                    return False
+        finally:
+            # On failure, cancel a copy still in progress instead of waiting
+            # for it; it removes its partial file
+            stop_copy.set()
+            copier.shutdown(wait=True)
         
-        # Step 5: Create DeepLabCut CSV file
-        if not self.create_deeplabcut_csv(output_dir, scorer, project_name):
-            print("❌ CSV file creation failed, pipeline terminated")
-            return False
+        return True
+    
+    def run_pipeline(self, xml_file: str, video_file: str, output_dir: str,
+                    project_name: str = "BeePoseEstimation", scorer: str = "manual"):
+        """
+        Run complete conversion pipeline
         
-        # Step 6: Create DeepLabCut configuration file
-        if not self.create_deeplabcut_config(output_dir, project_name, scorer):
-            print("❌ Configuration file creation failed, pipeline terminated")
-            return False
+        Args:
+            xml_file: CVAT XML file path
+            video_file: Video file path
+            output_dir: Output directory
+            project_name: Project name
+            scorer: Scorer name
+        """
+        logger.info("🐝 CVAT to DeepLabCut Conversion Pipeline")
+        logger.info("=" * 60)
         
-        # Step 7: Copy video file to project
-        if not self.copy_video_to_project(video_file, output_dir):
-            print("❌ Video file copying failed, pipeline terminated")
+        # Frame selection is asked interactively
+        if not self.run_all(xml_file, video_file, output_dir, scorer, project_name):
             return False
         
-        # Step 8: Generate h5 file
-        self.generate_h5_file(output_dir, scorer)
-        
-        # Step 9: Create dataset summary
-        self.create_dataset_summary(output_dir, project_name, scorer)
-        
-        print("\n🎉 Conversion pipeline completed!")
-        print(f"📁 Output directory: {output_dir}")
-        print("\n📋 Generated file structure:")
-        print(f"  {output_dir}/")
-        print(f"  ├── labeled-data/")
-        video_name = Path(video_file).stem
-        print(f"  │   └── {video_name}/")
-        print(f"  │       ├── CollectedData_{scorer}.csv   # Annotation data CSV")
-        print(f"  │       ├── CollectedData_{scorer}.h5    # Annotation data H5")
-        print(f"  │       └── frame_*.png                 # Extracted video frames")
-        print(f"  ├── videos/")
-        print(f"  │   └── {Path(video_file).name}                    # Original video")
-        print(f"  ├── config.yaml                        # DeepLabCut configuration")
-        print(f"  └── dataset_summary.txt                 # Dataset summary")
-        print("\n🚀 You can now use this directory as a DeepLabCut project for training!")
+        # Emit the closing report as one multi-line record rather than one
+        # record (and stream flush) per line
+        video_path = Path(video_file)
+        video_name = video_path.stem
+        logger.info("\n".join([
+            "\n🎉 Conversion pipeline completed!",
+            f"📁 Output directory: {output_dir}",
+            "\n📋 Generated file structure:",
+            f"  {output_dir}/",
+            f"  ├── labeled-data/",
+            f"  │   └── {video_name}/",
+            f"  │       ├── CollectedData_{scorer}.csv   # Annotation data CSV",
+            f"  │       ├── CollectedData_{scorer}.h5    # Annotation data H5",
+            f"  │       └── frame_*.png                 # Extracted video frames",
+            f"  ├── videos/",
+            f"  │   └── {video_path.name}                    # Original video",
+            f"  ├── config.yaml                        # DeepLabCut configuration",
+            f"  └── dataset_summary.txt                 # Dataset summary",
+            "\n🚀 You can now use this directory as a DeepLabCut project for training!",
+        ]))
         
         return True
 
@@ -874,13 +1473,15 @@ Features:
     
     args = parser.parse_args()
     
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    
     # Validate input files
     if not os.path.exists(args.xml_file):
-        print(f"❌ Error: XML file does not exist: {args.xml_file}")
+        logger.error(f"❌ Error: XML file does not exist: {args.xml_file}")
         return
     
     if not os.path.exists(args.video_file):
-        print(f"❌ Error: Video file does not exist: {args.video_file}")
+        logger.error(f"❌ Error: Video file does not exist: {args.video_file}")
         return
     
     # Create output directory
@@ -897,7 +1498,7 @@ Features:
     )
     
     if not success:
-        print("\n❌ Conversion pipeline execution failed!")
+        logger.error("\n❌ Conversion pipeline execution failed!")
         sys.exit(1)
 
 
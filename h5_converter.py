@@ -1,17 +1,42 @@
 #!/usr/bin/env python3
 """
 H5 Converter Utility
-A utility script to handle DeepLabCut CSV to H5 conversion with automatic 'yes' response
+A utility script to convert DeepLabCut annotation CSV files to H5 without DeepLabCut's prompt
 """
 
 import sys
 import os
 from pathlib import Path
 
+import pandas as pd
+
+
+def convert_csv_to_h5(csv_file: Path) -> Path:
+    """
+    Convert one CollectedData CSV file to the matching h5 file
+    
+    Args:
+        csv_file: Path to the CollectedData_<scorer>.csv file
+        
+    Returns:
+        Path of the written h5 file
+    """
+    # Same layout deeplabcut.convertcsv2h5 produces: labeled-data, video,
+    # image rows under scorer/bodyparts/coords columns
+    df = pd.read_csv(csv_file, header=[0, 1, 2], index_col=[0, 1, 2],
+                     float_precision='round_trip').astype(float)
+    h5_file = csv_file.with_suffix('.h5')
+    df.to_hdf(h5_file, key='df_with_missing', mode='w')
+    return h5_file
+
 
 def convert_csv_to_h5_auto(config_path: str, scorer: str) -> bool:
     """
-    Convert CSV to H5 with automatic 'yes' response to DeepLabCut prompts
+    Convert every labeled-data CSV of a project to H5
+    
+    Writes the files directly with pandas, so unlike
+    deeplabcut.convertcsv2h5 there is no confirmation prompt to answer
+    and DeepLabCut does not need to be installed
     
     Args:
         config_path: Path to config.yaml file
@@ -20,73 +45,19 @@ def convert_csv_to_h5_auto(config_path: str, scorer: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
+    csv_files = sorted(Path(config_path).parent.glob(f"labeled-data/*/CollectedData_{scorer}.csv"))
+    if not csv_files:
+        print(f"❌ No CollectedData_{scorer}.csv found in labeled-data")
+        return False
+    
     try:
-        import deeplabcut
-        
-        # Method 1: Try to patch the input function
-        try:
-            # Backup original input function
-            original_input = __builtins__['input'] if isinstance(__builtins__, dict) else __builtins__.input
-            
-            # Define our auto-yes input function
-            def auto_yes_input(prompt=''):
-                print(f"{prompt}yes")  # Print the prompt and our response
-                return 'yes'
-            
-            # Temporarily replace input function
-            if isinstance(__builtins__, dict):
-                __builtins__['input'] = auto_yes_input
-            else:
-                __builtins__.input = auto_yes_input
-            
-            # Call the conversion function
-            deeplabcut.convertcsv2h5(config_path, scorer=scorer)
-            
-            # Restore original input function
-            if isinstance(__builtins__, dict):
-                __builtins__['input'] = original_input
-            else:
-                __builtins__.input = original_input
-                
-            print("✅ H5 conversion completed successfully")
-            return True
-            
-        except Exception as e1:
-            # Restore input function in case of error
-            try:
-                if isinstance(__builtins__, dict):
-                    __builtins__['input'] = original_input
-                else:
-                    __builtins__.input = original_input
-            except:
-                pass
-            
-            # Method 2: Try using environment variables
-            try:
-                os.environ['PYTHONIOENCODING'] = 'utf-8'
-                os.environ['DLC_BATCH_MODE'] = '1'
-                
-                # Try again with environment variable
-                deeplabcut.convertcsv2h5(config_path, scorer=scorer)
-                print("✅ H5 conversion completed successfully")
-                return True
-                
-            except Exception as e2:
-                print(f"⚠️ Warning: H5 conversion requires manual confirmation")
-                print(f"   DeepLabCut is asking: 'Do you want to convert the csv file in folder: ... ?'")
-                print(f"   Please answer 'yes' when prompted")
-                
-                # Try one more time with the original function
-                try:
-                    deeplabcut.convertcsv2h5(config_path, scorer=scorer)
-                    print("✅ H5 conversion completed successfully")
-                    return True
-                except Exception as e3:
-                    print(f"❌ H5 conversion failed: {e3}")
-                    return False
-                    
-    except ImportError:
-        print("❌ DeepLabCut is not installed")
+        for csv_file in csv_files:
+            h5_file = convert_csv_to_h5(csv_file)
+            print(f"✅ H5 file written: {h5_file}")
+        return True
+    except ImportError as e:
+        # pandas needs PyTables to write h5 files
+        print(f"❌ H5 conversion requires PyTables (pip install tables): {e}")
         return False
     except Exception as e:
         print(f"❌ H5 conversion failed: {e}")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+CVAT to DeepLabCut Pipeline Runner
+Runs the conversion pipeline non-interactively so its progress can be streamed
+line by line from a separate process (used by the GUI)
+"""
+
+import sys
+import argparse
+import logging
+
+from cvat_to_deeplabcut_pipeline import CVATToDeepLabCutPipeline
+
+logger = logging.getLogger(__name__)
+
+
+def run_conversion(args: argparse.Namespace) -> bool:
+    """
+    Run every conversion stage in order, logging progress
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Whether the conversion was successful
+    """
+    pipeline = CVATToDeepLabCutPipeline()
+
+    logger.info("🚀 Starting CVAT to DeepLabCut conversion...")
+
+    if args.start is not None and args.end is not None:
+        frame_selection = "range"
+        frame_range = (args.start, args.end)
+    else:
+        frame_selection = "full"
+        frame_range = None
+
+    if not pipeline.run_all(args.xml_file, args.video_file, args.output_dir,
+                            args.scorer, args.project, frame_selection, frame_range):
+        return False
+
+    logger.info("\n🎉 Conversion completed successfully!")
+    logger.info(f"📁 Output directory: {args.output_dir}")
+    return True
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description='Run the CVAT to DeepLabCut conversion pipeline non-interactively'
+    )
+
+    parser.add_argument('xml_file',
+                       help='CVAT exported XML annotation file path')
+
+    parser.add_argument('video_file',
+                       help='Original video file path')
+
+    parser.add_argument('output_dir',
+                       help='Output project directory path')
+
+    parser.add_argument('--project',
+                       default='BeePoseEstimation',
+                       help='Project name (default: BeePoseEstimation)')
+
+    parser.add_argument('--scorer',
+                       default='manual',
+                       help='Scorer name (default: manual)')
+
+    parser.add_argument('--start',
+                       type=int,
+                       help='Start frame of the range (default: use all frames)')
+
+    parser.add_argument('--end',
+                       type=int,
+                       help='End frame of the range (default: use all frames)')
+
+    args = parser.parse_args()
+    
+    if (args.start is None) != (args.end is None):
+        parser.error("--start and --end must be given together")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
+    success = run_conversion(args)
+
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()